@@ -8,28 +8,39 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, Literal
-import nltk
+import os
 import re
+import html
 from datetime import datetime
 import sqlite3
+import threading
+import asyncio
+import logging
 import requests
-from bs4 import BeautifulSoup
-from trafilatura import fetch_url, extract
-
-# Download required NLTK data
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
-    
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords')
+import httpx
+from trafilatura import extract
+from trafilatura.settings import DEFAULT_CONFIG
+from trafilatura.utils import decode_file
+from cachetools import LRUCache, TTLCache
+import hashlib
+import numpy as np
+from numba import njit
+import spacy
+from spacy.attrs import LOWER, IS_ALPHA, IS_STOP, SENT_START
+
+_TITLE_RE = re.compile(r'<title[^>]*>([^<]+)</title>', re.IGNORECASE)
+
+# Same page size bounds trafilatura.fetch_url applies, also used to cap text
+MAX_FILE_SIZE = DEFAULT_CONFIG.getint('DEFAULT', 'MAX_FILE_SIZE')
+MIN_FILE_SIZE = DEFAULT_CONFIG.getint('DEFAULT', 'MIN_FILE_SIZE')
 
-from nltk.corpus import stopwords
-from nltk.tokenize import sent_tokenize, word_tokenize
-from collections import Counter
+# Blank English pipeline: rule-based tokenizer plus sentence boundaries only,
+# so one pass over the text yields both sentences and word tokens
+_NLP = spacy.blank("en")
+_NLP.add_pipe("sentencizer")
+# spaCy's 1M character default guards parser/NER memory, which this pipeline
+# does not load; allow anything up to the largest page we accept
+_NLP.max_length = MAX_FILE_SIZE
 
 app = FastAPI(title="Article Summarizer API", version="1.0.0")
 
@@ -45,13 +56,24 @@ app.add_middleware(
 # Database setup
 DB_PATH = "summarizer.db"
 
+# Shared connection, opened once per process at startup. It may be used from
+# more than one thread, so every use goes through _db_lock. Endpoints that
+# query it are plain `def` so FastAPI runs them in its threadpool and the
+# event loop never blocks on the lock while the batch writer commits.
+_db_lock = threading.Lock()
+
+@app.on_event("startup")
 def init_db():
-    """Initialize SQLite database"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
+    """Open the shared SQLite connection and initialize the database"""
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, 
+                           isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute('PRAGMA mmap_size=268435456')
     
     # Create summaries table
-    c.execute('''
+    conn.execute('''
         CREATE TABLE IF NOT EXISTS summaries (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             source_type TEXT NOT NULL,
@@ -65,7 +87,7 @@ def init_db():
     ''')
     
     # Create analytics table
-    c.execute('''
+    conn.execute('''
         CREATE TABLE IF NOT EXISTS analytics (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             endpoint TEXT NOT NULL,
@@ -74,10 +96,48 @@ def init_db():
         )
     ''')
     
-    conn.commit()
-    conn.close()
+    # Indexes for /history ordering and the /analytics success rollup
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS ix_summaries_created
+        ON summaries(created_at DESC)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS ix_analytics_success
+        ON analytics(success)
+    ''')
+    
+    app.state.db = conn
+
+@app.on_event("startup")
+async def start_db_writer():
+    """Start the background task that persists queued writes"""
+    app.state.write_queue = asyncio.Queue()
+    app.state.db_writer = asyncio.create_task(
+        _db_writer(app.state.write_queue))
+
+@app.on_event("startup")
+async def open_http_client():
+    """Open the shared HTTP client used to download articles"""
+    app.state.http = httpx.AsyncClient(
+        http2=True,
+        timeout=15,
+        follow_redirects=True,
+        headers={"User-Agent": "Mozilla/5.0 (compatible; ArticleSummarizer/1.0)"}
+    )
+
+@app.on_event("shutdown")
+async def close_http_client():
+    """Close the shared HTTP client"""
+    await app.state.http.aclose()
 
-init_db()
+@app.on_event("shutdown")
+async def close_db():
+    """Flush queued writes and close the shared SQLite connection"""
+    app.state.write_queue.put_nowait(None)
+    await app.state.db_writer
+    
+    with _db_lock:
+        app.state.db.close()
 
 # Request/Response models
 class SummarizeRequest(BaseModel):
@@ -93,83 +153,175 @@ class SummarizeResponse(BaseModel):
     method: str
     original_length: int
 
-# Extractive Summarizer using NLTK
-class ExtractiveSummarizer:
-    def __init__(self):
-        self.stop_words = set(stopwords.words('english'))
+# Text preprocessing
+# ASCII fast path deletes the same characters as _PUNCT_RE; anything else
+# goes through the regex so \w keeps its full Unicode meaning
+_PUNCT_RE = re.compile(r'[^\w\s.,!?-]')
+_ASCII_STRIP_TABLE = str.maketrans({
+    c: None for c in map(chr, range(128))
+    if not (c.isalnum() or c.isspace() or c in '_.,!?-')
+})
+
+def clean_text(text: str) -> str:
+    """Clean and normalize text"""
+    if text.isascii():
+        text = text.translate(_ASCII_STRIP_TABLE)
+    else:
+        text = _PUNCT_RE.sub('', text)
+    return ' '.join(text.split())
+
+def tokenize_sentences(text: str) -> tuple:
+    """Split text into sentences and the word ids of their scored tokens.
     
-    def clean_text(self, text: str) -> str:
-        """Clean and normalize text"""
-        text = re.sub(r'\s+', ' ', text)
-        text = re.sub(r'[^\w\s.,!?-]', '', text)
-        return text.strip()
+    Returns (sentences, sent_offsets, word_ids), where word_ids holds the
+    lowercase hash of every alphabetic non-stopword token and sentence i owns
+    word_ids[sent_offsets[i]:sent_offsets[i + 1]].
+    """
+    doc = _NLP(text)
+    sentences = tuple(sent.text for sent in doc.sents)
     
-    def calculate_word_frequency(self, text: str) -> dict:
-        """Calculate word frequency scores"""
-        words = word_tokenize(text.lower())
-        words = [w for w in words if w.isalnum() and w not in self.stop_words]
-        
-        freq = Counter(words)
-        max_freq = max(freq.values()) if freq else 1
-        
-        # Normalize frequencies
-        for word in freq:
-            freq[word] = freq[word] / max_freq
-        
-        return freq
+    # Export all token attributes in one call and bucket them by sentence
+    attrs = doc.to_array([LOWER, IS_ALPHA, IS_STOP, SENT_START])
+    sent_ids = np.cumsum(attrs[:, 3] == 1) - 1
+    keep = (attrs[:, 1] == 1) & (attrs[:, 2] == 0)
     
-    def score_sentences(self, sentences: list, word_freq: dict) -> dict:
-        """Score sentences based on word frequencies"""
-        sentence_scores = {}
-        
-        for i, sentence in enumerate(sentences):
-            words = word_tokenize(sentence.lower())
-            words = [w for w in words if w.isalnum()]
-            
-            score = 0
-            word_count = 0
-            
-            for word in words:
-                if word in word_freq:
-                    score += word_freq[word]
-                    word_count += 1
-            
-            # Average score per word to normalize for sentence length
-            if word_count > 0:
-                sentence_scores[i] = score / word_count
-            else:
-                sentence_scores[i] = 0
+    word_ids = attrs[keep, 0]
+    sent_offsets = np.zeros(len(sentences) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sent_ids[keep], minlength=len(sentences)),
+              out=sent_offsets[1:])
+    
+    return sentences, sent_offsets, word_ids
+
+def calculate_word_frequency(word_ids: np.ndarray) -> tuple:
+    """Calculate normalized word frequency scores.
+    
+    Returns a (token_ids, freq_vec) pair: token_ids maps each scored token to
+    its word's entry in the float32 score array.
+    """
+    _, token_ids, counts = np.unique(word_ids, return_inverse=True,
+                                     return_counts=True)
+    token_ids = token_ids.astype(np.int32).ravel()
+    freq_vec = counts.astype(np.float32)
+    
+    # Normalize frequencies
+    if len(freq_vec):
+        freq_vec /= freq_vec.max()
+    
+    return token_ids, freq_vec
+
+@njit(cache=True)
+def _score_all(sent_offsets, token_ids, freq_vec):
+    """Sum the word scores of each sentence's tokens, with the token counts"""
+    n_sentences = len(sent_offsets) - 1
+    scores = np.zeros(n_sentences, dtype=np.float32)
+    counts = np.zeros(n_sentences, dtype=np.float32)
+    
+    for i in range(n_sentences):
+        for j in range(sent_offsets[i], sent_offsets[i + 1]):
+            scores[i] += freq_vec[token_ids[j]]
+        counts[i] = sent_offsets[i + 1] - sent_offsets[i]
+    
+    return scores, counts
+
+def _top_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores in document order; ties keep the
+    earliest sentences, as a stable descending sort would"""
+    n = len(scores)
+    if k <= 0 or k >= n:
+        return np.sort(np.argsort(-scores, kind='stable')[:k])
+    
+    # O(n): everything above the k-th score, then the earliest ties with it
+    kth = np.partition(scores, n - k)[n - k]
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[:k - len(above)]
+    return np.union1d(above, ties)
+
+# Extractive Summarizer using spaCy tokenization
+class ExtractiveSummarizer:
+    def score_sentences(self, sent_offsets: np.ndarray, token_ids: np.ndarray,
+                        freq_vec: np.ndarray) -> np.ndarray:
+        """Score tokenized sentences based on word frequencies"""
+        scores, counts = _score_all(sent_offsets, token_ids, freq_vec)
         
-        return sentence_scores
+        # Average score per word to normalize for sentence length, in place
+        np.divide(scores, counts, out=scores, where=counts > 0)
+        return scores
     
     def summarize(self, text: str, num_sentences: int = 5) -> str:
         """Generate extractive summary"""
-        text = self.clean_text(text)
-        sentences = sent_tokenize(text)
+        # The sentencizer only splits after ., ! or ?, which cleaning keeps, so
+        # fewer terminators than requested sentences means nothing to drop
+        terminators = text.count('.') + text.count('!') + text.count('?')
+        if terminators < num_sentences:
+            return clean_text(text)
+        
+        text = clean_text(text)
+        
+        # Resubmitted articles are answered from memory. Keys are digests of
+        # the cleaned text, so the cache holds only the short summaries, and
+        # cleaning has already dropped characters UTF-8 cannot encode
+        cache_key = (hashlib.blake2b(text.encode()).digest(), num_sentences)
+        summary = _TEXT_SUMMARY_CACHE.get(cache_key)
+        if summary is not None:
+            return summary
+        
+        sentences, sent_offsets, word_ids = tokenize_sentences(text)
         
         if len(sentences) <= num_sentences:
             return text
         
-        word_freq = self.calculate_word_frequency(text)
-        sentence_scores = self.score_sentences(sentences, word_freq)
-        
-        # Get top sentences
-        top_sentences = sorted(sentence_scores.items(), 
-                              key=lambda x: x[1], 
-                              reverse=True)[:num_sentences]
+        token_ids, freq_vec = calculate_word_frequency(word_ids)
+        sentence_scores = self.score_sentences(sent_offsets, token_ids, freq_vec)
         
-        # Sort by original order
-        top_sentences = sorted(top_sentences, key=lambda x: x[0])
+        # Get top sentences in original order
+        top_sentences = _top_indices(sentence_scores, num_sentences)
+        summary = ' '.join([sentences[i] for i in top_sentences])
         
-        summary = ' '.join([sentences[i] for i, _ in top_sentences])
+        _TEXT_SUMMARY_CACHE[cache_key] = summary
         return summary
 
+_TEXT_SUMMARY_CACHE = LRUCache(maxsize=1024)
+
+summarizer = ExtractiveSummarizer()
+
+# Response caches for URL requests. Extracted articles are kept longer than
+# summaries so a different sentence count reuses the download.
+_SUMMARY_CACHE = TTLCache(maxsize=1024, ttl=3600)
+_ARTICLE_CACHE = TTLCache(maxsize=1024, ttl=6 * 3600)
+
 # Article extractor
-def extract_article_text(url: str) -> tuple:
+async def fetch_html(url: str) -> Optional[str]:
+    """Download a page and decode it, or return None if it is unusable"""
+    async with app.state.http.stream("GET", url) as response:
+        if response.status_code != 200:
+            return None
+        
+        declared = response.headers.get("Content-Length")
+        if declared and declared.isdigit() and int(declared) > MAX_FILE_SIZE:
+            return None
+        
+        # Stop reading as soon as the body outgrows the limit
+        body = bytearray()
+        async for chunk in response.aiter_bytes():
+            body += chunk
+            if len(body) > MAX_FILE_SIZE:
+                return None
+    
+    if len(body) < MIN_FILE_SIZE:
+        return None
+    
+    # Detects the encoding from the bytes and <meta charset>, like fetch_url
+    return decode_file(bytes(body))
+
+async def extract_article_text(url: str) -> tuple:
     """Extract text from URL using trafilatura"""
+    article = _ARTICLE_CACHE.get(url)
+    if article is not None:
+        return article
+    
     try:
         # Fetch the webpage
-        downloaded = fetch_url(url)
+        downloaded = await fetch_html(url)
         
         if not downloaded:
             raise HTTPException(status_code=400, 
@@ -183,10 +335,11 @@ def extract_article_text(url: str) -> tuple:
             raise HTTPException(status_code=400, 
                               detail="Could not extract text from URL")
         
-        # Try to extract title
-        soup = BeautifulSoup(downloaded, 'html.parser')
-        title = soup.title.string if soup.title else "Article"
+        # Try to extract title without building a second parse tree
+        match = _TITLE_RE.search(downloaded)
+        title = html.unescape(match.group(1)).strip() if match else "Article"
         
+        _ARTICLE_CACHE[url] = text, title
         return text, title
         
     except HTTPException:
@@ -196,33 +349,80 @@ def extract_article_text(url: str) -> tuple:
                           detail=f"Failed to extract article: {str(e)}")
 
 # Database operations
+# Inserts are queued by the request handlers and written by a single
+# background task, which commits everything queued within
+# WRITE_BATCH_INTERVAL seconds in one transaction.
+WRITE_BATCH_INTERVAL = 0.1
+
+INSERT_SUMMARY_SQL = '''
+    INSERT INTO summaries 
+    (source_type, source_content, summary, word_count, original_length, method)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_ANALYTICS_SQL = '''
+    INSERT INTO analytics (endpoint, success)
+    VALUES (?, ?)
+'''
+
+def _write_batch(batch: list):
+    """Insert a batch of queued (sql, params) records in one transaction"""
+    grouped = {}
+    for sql, params in batch:
+        grouped.setdefault(sql, []).append(params)
+    
+    with _db_lock:
+        db = app.state.db
+        db.execute('BEGIN')
+        try:
+            for sql, rows in grouped.items():
+                db.executemany(sql, rows)
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+def _write_each(batch: list):
+    """Insert queued records one at a time, logging any that fail"""
+    with _db_lock:
+        for sql, params in batch:
+            try:
+                app.state.db.execute(sql, params)
+            except Exception:
+                logging.exception("Failed to write queued record")
+
+async def _db_writer(queue: asyncio.Queue):
+    """Drain the write queue in batches until a None sentinel arrives"""
+    while True:
+        batch = [await queue.get()]
+        await asyncio.sleep(WRITE_BATCH_INTERVAL)
+        while not queue.empty():
+            batch.append(queue.get_nowait())
+        
+        records = [record for record in batch if record is not None]
+        if records:
+            try:
+                await asyncio.to_thread(_write_batch, records)
+            except Exception:
+                # Retry individually so one bad record doesn't drop the batch
+                await asyncio.to_thread(_write_each, records)
+        
+        if len(records) < len(batch):
+            return
+
 def save_summary(source_type: str, source_content: str, summary: str, 
                 word_count: int, original_length: int, method: str):
-    """Save summary to database"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    c.execute('''
-        INSERT INTO summaries 
-        (source_type, source_content, summary, word_count, original_length, method)
-        VALUES (?, ?, ?, ?, ?, ?)
-    ''', (source_type, source_content[:500], summary, word_count, original_length, method))
-    
-    conn.commit()
-    conn.close()
+    """Queue summary to be saved to database"""
+    # Raw request text may hold lone surrogates, which SQLite can't store
+    source_content = source_content[:500].encode('utf-8', 'replace').decode()
+    app.state.write_queue.put_nowait((INSERT_SUMMARY_SQL, (
+        source_type, source_content, summary, word_count, 
+        original_length, method
+    )))
 
 def log_api_call(endpoint: str, success: bool):
-    """Log API usage"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    c.execute('''
-        INSERT INTO analytics (endpoint, success)
-        VALUES (?, ?)
-    ''', (endpoint, success))
-    
-    conn.commit()
-    conn.close()
+    """Queue API usage log entry"""
+    app.state.write_queue.put_nowait((INSERT_ANALYTICS_SQL, (endpoint, success)))
 
 # API Endpoints
 @app.get("/")
@@ -250,7 +450,14 @@ async def summarize(request: SummarizeRequest):
         
         # Extract text
         if request.url:
-            text, title = extract_article_text(request.url)
+            # Serve repeated URL requests from memory
+            cache_key = (request.url, request.sentences)
+            cached = _SUMMARY_CACHE.get(cache_key)
+            if cached is not None:
+                log_api_call("/summarize", True)
+                return cached
+            
+            text, title = await extract_article_text(request.url)
             source_type = "url"
             source_content = request.url
         else:
@@ -262,13 +469,17 @@ async def summarize(request: SummarizeRequest):
             raise HTTPException(status_code=400, 
                               detail="Text is too short to summarize")
         
+        if len(text) > MAX_FILE_SIZE:
+            raise HTTPException(status_code=400, 
+                              detail="Text is too long to summarize")
+        
         original_length = len(text.split())
         
         # Generate summary
-        summarizer = ExtractiveSummarizer()
         summary = summarizer.summarize(text, request.sentences)
         
-        word_count = len(summary.split())
+        # Summaries are built from cleaned, single-spaced text
+        word_count = summary.count(' ') + 1 if summary else 0
         
         # Save to database
         save_summary(source_type, source_content, summary, 
@@ -277,7 +488,7 @@ async def summarize(request: SummarizeRequest):
         # Log success
         log_api_call("/summarize", True)
         
-        return SummarizeResponse(
+        response = SummarizeResponse(
             summary=summary,
             word_count=word_count,
             source=source_type,
@@ -285,6 +496,11 @@ async def summarize(request: SummarizeRequest):
             original_length=original_length
         )
         
+        if request.url:
+            _SUMMARY_CACHE[cache_key] = response
+        
+        return response
+        
     except HTTPException:
         log_api_call("/summarize", False)
         raise
@@ -293,21 +509,16 @@ async def summarize(request: SummarizeRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/history")
-async def get_history(limit: int = 10):
+def get_history(limit: int = 10):
     """Get summary history"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    c.execute('''
-        SELECT id, source_type, source_content, summary, word_count, 
-               original_length, method, created_at
-        FROM summaries
-        ORDER BY created_at DESC
-        LIMIT ?
-    ''', (limit,))
-    
-    rows = c.fetchall()
-    conn.close()
+    with _db_lock:
+        rows = app.state.db.execute('''
+            SELECT id, source_type, source_content, summary, word_count, 
+                   original_length, method, created_at
+            FROM summaries
+            ORDER BY created_at DESC
+            LIMIT ?
+        ''', (limit,)).fetchall()
     
     history = []
     for row in rows:
@@ -325,29 +536,20 @@ async def get_history(limit: int = 10):
     return {"history": history, "count": len(history)}
 
 @app.get("/analytics")
-async def get_analytics():
+def get_analytics():
     """Get usage analytics"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    # Total API calls
-    c.execute('SELECT COUNT(*) FROM analytics')
-    total_calls = c.fetchone()[0]
-    
-    # Success rate
-    c.execute('SELECT COUNT(*) FROM analytics WHERE success = 1')
-    successful_calls = c.fetchone()[0]
-    
-    # Total summaries
-    c.execute('SELECT COUNT(*) FROM summaries')
-    total_summaries = c.fetchone()[0]
-    
-    # Average word count
-    c.execute('SELECT AVG(word_count) FROM summaries')
-    avg_word_count = c.fetchone()[0] or 0
-    
-    conn.close()
+    with _db_lock:
+        # Total and successful API calls
+        total_calls, successful_calls = app.state.db.execute(
+            'SELECT COUNT(*), COALESCE(SUM(success), 0) FROM analytics'
+        ).fetchone()
+        
+        # Total summaries and average word count
+        total_summaries, avg_word_count = app.state.db.execute(
+            'SELECT COUNT(*), AVG(word_count) FROM summaries'
+        ).fetchone()
     
+    avg_word_count = avg_word_count or 0
     success_rate = (successful_calls / total_calls * 100) if total_calls > 0 else 0
     
     return {
@@ -359,20 +561,15 @@ async def get_analytics():
     }
 
 @app.delete("/history/{summary_id}")
-async def delete_summary(summary_id: int):
+def delete_summary(summary_id: int):
     """Delete a summary by ID"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    c.execute('DELETE FROM summaries WHERE id = ?', (summary_id,))
+    with _db_lock:
+        c = app.state.db.execute('DELETE FROM summaries WHERE id = ?', 
+                                 (summary_id,))
     
     if c.rowcount == 0:
-        conn.close()
         raise HTTPException(status_code=404, detail="Summary not found")
     
-    conn.commit()
-    conn.close()
-    
     return {"message": "Summary deleted successfully"}
 
 if __name__ == "__main__":
@@ -380,4 +577,8 @@ if __name__ == "__main__":
     print("🚀 Starting Article Summarizer API...")
     print("📝 API Documentation: http://localhost:8000/docs")
     print("🔗 API Root: http://localhost:8000")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # One worker per core; each opens its own DB connection and HTTP client
+    # in the startup hooks. uvicorn[standard] ships uvloop and httptools,
+    # which "auto" selects wherever they are supported.
+    uvicorn.run("main:app", host="0.0.0.0", port=8000,
+                workers=os.cpu_count() or 1, loop="auto", http="auto")
\ No newline at end of file